@@ -1,11 +1,16 @@
 import os
-import json
+import base64
+import tempfile
+import asyncio
+import logging
+import orjson
+import jiter
 from fastapi import File, UploadFile, FastAPI, HTTPException, Query
 from pydantic import BaseModel
-from requests.auth import HTTPBasicAuth
-from typing import List, Optional, Any
+from typing import List, Optional
+from contextvars import ContextVar
 from dotenv import load_dotenv
-import requests
+import httpx
 
 # Load environment variables from .env
 load_dotenv()
@@ -18,24 +23,109 @@ if not all([JIRA_EMAIL, JIRA_API_TOKEN, JIRA_DOMAIN]):
     raise ValueError("Missing required environment variables: JIRA_EMAIL, JIRA_API_TOKEN, or JIRA_DOMAIN")
 JIRA_BASE_URL = f"https://{JIRA_DOMAIN}"
 
+# Logging (set LOG_LEVEL=DEBUG in .env to trace every Jira request)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="[%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO; safe_request already covers that at DEBUG
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Jira Cloud compresses responses; httpx decodes brotli only when the brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip"
+
+# Headers sent with every Jira request, with the Basic auth credentials encoded once at import.
+# JSON bodies get their Content-Type from httpx, which keeps multipart uploads working.
+_AUTH_HEADER = "Basic " + base64.b64encode(f"{JIRA_EMAIL}:{JIRA_API_TOKEN}".encode()).decode()
+_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Authorization": _AUTH_HEADER
+}
+
+# Maximum number of Jira requests in flight at once, shared by all handlers
+JIRA_CONCURRENCY = 16
+
+# Throttled (429) and gateway (502/503/504) responses are retried with backoff
+JIRA_MAX_RETRIES = 3
+JIRA_RETRY_BACKOFF = 0.5
+_RETRY_STATUSES = {429, 502, 503, 504}
+
 # FastAPI app initialization
 app = FastAPI(
     title="JIRA Integration API",
     description="Fetch and manage JIRA Boards, Epics, Stories, Tasks"
 )
 
-# ---------------------- HELPERS ----------------------
+# Shared HTTP/2 connection pool, opened on startup and closed on shutdown
+client: Optional[httpx.AsyncClient] = None
+_jira_semaphore: Optional[asyncio.Semaphore] = None
+
+@app.on_event("startup")
+async def open_jira_client():
+    global client, _jira_semaphore, _epic_link_field_id_lock
+    _jira_semaphore = asyncio.Semaphore(JIRA_CONCURRENCY)
+    _epic_link_field_id_lock = asyncio.Lock()
+    client = httpx.AsyncClient(
+        base_url=JIRA_BASE_URL,
+        headers=_HEADERS,
+        # Transport retries cover connection failures; safe_request retries 429/5xx responses
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            retries=3
+        ),
+        timeout=30
+    )
+
+@app.on_event("shutdown")
+async def close_jira_client():
+    if client is not None:
+        await client.aclose()
 
-def get_jira_session():
-    return HTTPBasicAuth(JIRA_EMAIL, JIRA_API_TOKEN), {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
+# ---------------------- HELPERS ----------------------
 
-def safe_request(method, url, headers, auth, **kwargs):
+async def gather_or_cancel(*aws):
+    # Like asyncio.gather, but once one awaitable fails the rest are cancelled instead of
+    # running on in the background and calling Jira after the error has been returned
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return JIRA_RETRY_BACKOFF * 2 ** attempt
+
+async def safe_request(method, url, retry_server_errors=None, **kwargs):
+    # 429 means Jira did not process the request, so it is always safe to retry. Gateway errors
+    # are only retried for idempotent methods, or when the caller says the request is read-only.
+    if retry_server_errors is None:
+        retry_server_errors = method.upper() in ("GET", "PUT", "DELETE")
     try:
-        response = requests.request(method, url, headers=headers, auth=auth, **kwargs)
-        print(f"[DEBUG] {method.upper()} {url} -> Status: {response.status_code}, Content: {response.text[:500]}")
+        for attempt in range(JIRA_MAX_RETRIES + 1):
+            async with _jira_semaphore:
+                response = await client.request(method, url, **kwargs)
+            retryable = response.status_code == 429 or (retry_server_errors and response.status_code in _RETRY_STATUSES)
+            if not retryable or attempt == JIRA_MAX_RETRIES:
+                break
+            delay = _retry_delay(response, attempt)
+            logger.warning("%s %s -> Status: %d, retrying in %.1fs", method.upper(), url, response.status_code, delay)
+            # Sleep outside the semaphore so other requests can use the slot meanwhile
+            await asyncio.sleep(delay)
+        logger.debug("%s %s -> Status: %d", method.upper(), url, response.status_code)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Content: %s", response.text[:500])
         if response.status_code == 401:
             raise HTTPException(status_code=401, detail="Authentication failed. Check JIRA_EMAIL and JIRA_API_TOKEN.")
         elif response.status_code == 403:
@@ -43,91 +133,188 @@ def safe_request(method, url, headers, auth, **kwargs):
         elif response.status_code == 404:
             raise HTTPException(status_code=404, detail=f"Resource not found: {url}")
         response.raise_for_status()
-        return response.json() if response.content else {}
-    except requests.exceptions.HTTPError as e:
+        # cache_mode="keys" interns the ADF keys ("type", "text", "content") repeated throughout Jira payloads
+        return jiter.from_json(response.content, cache_mode="keys") if response.content else {}
+    except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail=f"HTTP error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during {method.upper()} request to {url}: {str(e)}")
 
+def _iter_text(node):
+    # Yields every text leaf of an ADF node, however deeply it is nested (lists, panels, tables, ...)
+    if isinstance(node, dict):
+        if node.get("type") == "text":
+            yield node.get("text", "")
+        else:
+            for child in node.get("content", ()):
+                yield from _iter_text(child)
+    elif isinstance(node, list):
+        for child in node:
+            yield from _iter_text(child)
+
 def extract_description(description_field):
     if not description_field:
         return "No description"
     try:
-        content = description_field.get("content", [])
-        parts = []
-        for c in content:
-            if "content" in c:
-                for inner in c["content"]:
-                    if inner.get("type") == "text":
-                        parts.append(inner.get("text", ""))
-        return " ".join(parts).strip() or "No description"
+        return " ".join(_iter_text(description_field)).strip() or "No description"
     except Exception as e:
-        print(f"[WARN] Error extracting description: {e}")
+        logger.warning("Error extracting description: %s", e)
         return "No description"
 
 def extract_comments(comment_field):
     if not comment_field or not comment_field.get("comments"):
         return []
-    try:
-        return [
-            {
+    comments = []
+    append = comments.append
+    for c in comment_field["comments"]:
+        # A malformed comment is skipped on its own instead of discarding the whole list
+        try:
+            append({
                 "author": c["author"]["displayName"],
-                "body": " ".join(
-                    inner.get("text", "") for outer in c["body"].get("content", [])
-                    for inner in outer.get("content", []) if inner.get("type") == "text"
-                ).strip() or "No content",
+                "body": " ".join(_iter_text(c.get("body"))).strip() or "No content",
                 "created": c["created"]
-            }
-            for c in comment_field.get("comments", [])
-        ]
-    except Exception as e:
-        print(f"[WARN] Error extracting comments: {e}")
-        return []
+            })
+        except Exception as e:
+            logger.warning("Error extracting comment: %s", e)
+    return comments
 
-def search_issues(jql: str, max_results: int = 50):
-    auth, headers = get_jira_session()
+async def search_issues(jql: str, max_results: int = 100, fields: str = "summary,subtasks,description,comment,attachment"):
+    # Yields every matching issue, following startAt until Jira's reported total is reached
     url = f"{JIRA_BASE_URL}/rest/api/3/search"
-    params = {
-        "jql": jql,
-        "maxResults": max_results,
-        "fields": "summary,subtasks,description,comment,attachment"
-    }
-    return safe_request("GET", url, headers, auth, params=params).get("issues", [])
+    start_at = 0
+    while True:
+        payload = {
+            "jql": jql,
+            "startAt": start_at,
+            "maxResults": max_results,
+            "fields": fields.split(","),
+            # Unknown or invisible keys in "key in (...)" are dropped instead of failing the whole search
+            "validateQuery": "warn"
+        }
+        page = await safe_request("POST", url, retry_server_errors=True, json=payload)
+        issues = page.get("issues", [])
+        for issue in issues:
+            yield issue
+
+        start_at += len(issues)
+        if not issues or start_at >= page.get("total", 0):
+            break
 
+# Issue lookups shared by a single /hierarchy build, keyed by (issue_key, fields).
+# Scoped to one request so reads never go stale across requests.
+_issue_cache: ContextVar[Optional[dict]] = ContextVar("_issue_cache", default=None)
+
+async def collect_issues(jql: str, fields: str = "summary,subtasks,description,comment,attachment"):
+    return [issue async for issue in search_issues(jql, fields=fields)]
+
+async def bulk_get_issues(keys: List[str], fields: str, match: str = "key") -> dict:
+    # match="parent" returns the children of the given keys instead of the issues themselves
+    jqls = []
+    for i in range(0, len(keys), 100):
+        quoted = ",".join(f'"{key}"' for key in keys[i:i + 100])
+        jqls.append(f"{match} in ({quoted})")
+    results = await gather_or_cancel(*(collect_issues(jql, fields) for jql in jqls))
+    issues_by_key = {issue["key"]: issue for issues in results for issue in issues}
+
+    cache = _issue_cache.get()
+    if cache is not None:
+        for key, issue in issues_by_key.items():
+            if (key, fields) not in cache:
+                cached = asyncio.get_running_loop().create_future()
+                cached.set_result(issue)
+                cache[(key, fields)] = cached
+    return issues_by_key
+
+async def fetch_issue(issue_key: str, fields: str = "summary,description,comment,attachment"):
+    url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}"
+    # fields comes from a public query parameter, so let httpx encode it rather than splicing it into the URL
+    params = {"fields": fields}
+    cache = _issue_cache.get()
+    if cache is None:
+        return await safe_request("GET", url, params=params)
+
+    # Concurrent callers await the same in-flight request
+    if (issue_key, fields) not in cache:
+        cache[(issue_key, fields)] = asyncio.ensure_future(safe_request("GET", url, params=params))
+    return await cache[(issue_key, fields)]
+
+# None = not looked up yet, False = the instance has no "Epic Link" field
 _epic_link_field_id_cache = None
+_epic_link_field_id_lock: Optional[asyncio.Lock] = None
 
-def get_epic_link_field_id():
+async def get_epic_link_field_id():
     global _epic_link_field_id_cache
-    if _epic_link_field_id_cache:
-        return _epic_link_field_id_cache
+    if _epic_link_field_id_cache is not None:
+        return _epic_link_field_id_cache or None
+
+    # Concurrent story fetches wait for a single /field lookup instead of racing
+    async with _epic_link_field_id_lock:
+        if _epic_link_field_id_cache is not None:
+            return _epic_link_field_id_cache or None
+
+        url = f"{JIRA_BASE_URL}/rest/api/3/field"
+        fields = await safe_request("GET", url)
+
+        for field in fields:
+            if field.get("name", "").lower() == "epic link":
+                _epic_link_field_id_cache = field["id"]
+                return _epic_link_field_id_cache
+
+        logger.warning("'Epic Link' field not found. Falling back to parent field.")
+        _epic_link_field_id_cache = False
+        return None
 
-    auth, headers = get_jira_session()
-    url = f"{JIRA_BASE_URL}/rest/api/3/field"
-    fields = safe_request("GET", url, headers, auth)
+@app.on_event("startup")
+async def warm_epic_link_field_id():
+    try:
+        await get_epic_link_field_id()
+    except Exception as e:
+        logger.warning("Could not look up 'Epic Link' field at startup, will retry on first use: %s", e)
 
-    for field in fields:
-        if field.get("name", "").lower() == "epic link":
-            _epic_link_field_id_cache = field["id"]
-            return _epic_link_field_id_cache
+# Project style ("next-gen" or "classic") lookups by project key, shared while in flight
+_project_style_cache = {}
 
-    print("[WARN] 'Epic Link' field not found. Falling back to parent field.")
-    return None
+async def get_project_style(project_key: str):
+    if project_key not in _project_style_cache:
+        url = f"{JIRA_BASE_URL}/rest/api/3/project/{project_key}"
+        _project_style_cache[project_key] = asyncio.ensure_future(safe_request("GET", url))
 
-def fetch_stories(epic_key: str):
-    jqls = [f'parent = "{epic_key}"']
-    epic_link_field = get_epic_link_field_id()
-    if epic_link_field:
-        jqls.append(f'"{epic_link_field}" = "{epic_key}"')
+    try:
+        project = await _project_style_cache[project_key]
+    except Exception as e:
+        _project_style_cache.pop(project_key, None)
+        logger.warning("Could not determine style of project %s: %s", project_key, e)
+        return None
+    return project.get("style")
+
+async def get_epic_child_jqls(epic_key: str):
+    parent_jql = f'parent = "{epic_key}"'
+    epic_link_field = await get_epic_link_field_id()
+    if not epic_link_field:
+        return [parent_jql]
+
+    epic_link_jql = f'"{epic_link_field}" = "{epic_key}"'
+    style = await get_project_style(epic_key.split("-")[0])
+    if style == "next-gen":
+        return [parent_jql]
+    if style == "classic":
+        return [epic_link_jql]
+    # Unknown project style: try both, parent first
+    return [parent_jql, epic_link_jql]
+
+async def fetch_stories(epic_key: str):
+    jqls = await get_epic_child_jqls(epic_key)
 
     stories = []
     for jql in jqls:
         try:
-            issues = search_issues(jql)
+            # issuelinks lets the hierarchy resolve linked tasks without a GET per story
+            issues = await collect_issues(jql, fields="summary,description,comment,attachment,issuelinks")
             if issues:
                 stories = issues
                 break
         except Exception as e:
-            print(f"[WARN] Failed to fetch stories with JQL '{jql}': {e}")
+            logger.warning("Failed to fetch stories with JQL '%s': %s", jql, e)
 
     return {
         "stories": stories,
@@ -141,16 +328,16 @@ class SubtaskModel(BaseModel):
     key: str
     summary: str
     description: Optional[str] = None
-    comments: List[Any] = []
-    attachments: List[Any] = []
+    comments: List[dict] = []
+    attachments: List[dict] = []
 
 class TaskModel(BaseModel):
     id: str
     key: str
     summary: str
     description: Optional[str] = None
-    comments: List[Any] = []
-    attachments: List[Any] = []
+    comments: List[dict] = []
+    attachments: List[dict] = []
     subtasks: List[SubtaskModel] = []
 
 class StoryModel(BaseModel):
@@ -158,16 +345,16 @@ class StoryModel(BaseModel):
     key: str
     summary: str
     description: Optional[str] = None
-    comments: List[Any] = []
-    attachments: List[Any] = []
+    comments: List[dict] = []
+    attachments: List[dict] = []
     tasks: List[TaskModel]
 
 class EpicModel(BaseModel):
     id: str
     name: str
     description: Optional[str] = None
-    comments: List[Any] = []
-    attachments: List[Any] = []
+    comments: List[dict] = []
+    attachments: List[dict] = []
     stories: List[StoryModel]
 
 class BoardModel(BaseModel):
@@ -178,25 +365,29 @@ class BoardModel(BaseModel):
 # ---------------------- READ ENDPOINTS ----------------------
 
 @app.get("/boards", summary="Fetch all boards")
-def fetch_boards():
-    auth, headers = get_jira_session()
+async def fetch_boards():
     url = f"{JIRA_BASE_URL}/rest/agile/1.0/board"
-    return safe_request("GET", url, headers, auth).get("values", [])
+    return (await safe_request("GET", url)).get("values", [])
 
 @app.get("/boards/{board_id}/epics", summary="Fetch epics for a board with additional metadata")
-def fetch_epics(board_id: int):
-    auth, headers = get_jira_session()
+async def fetch_epics(board_id: int):
     url = f"{JIRA_BASE_URL}/rest/agile/1.0/board/{board_id}/epic"
-    epics = safe_request("GET", url, headers, auth, params={"fields": "summary,description,comment,attachment"}).get("values", [])
+    epics = (await safe_request("GET", url, params={"fields": "summary,description,comment,attachment"})).get("values", [])
+
+    try:
+        epic_issues = await bulk_get_issues([epic.get("key") for epic in epics], "summary,description,comment,attachment")
+    except Exception as e:
+        logger.warning("Failed to fetch epic details for board %s: %s", board_id, e)
+        epic_issues = {}
 
-    epics_with_metadata = []
     for epic in epics:
         epic_key = epic.get("key")
-        print(f"[INFO] Processing epic: {epic_key}")
+        logger.info("Processing epic: %s", epic_key)
 
         try:
-            epic_url = f"{JIRA_BASE_URL}/rest/api/3/issue/{epic_key}?fields=summary,description,comment,attachment"
-            epic_data = safe_request("GET", epic_url, headers, auth)
+            epic_data = epic_issues.get(epic_key)
+            if epic_data is None:
+                raise ValueError(f"issue {epic_key} not returned by search")
             description = extract_description(epic_data.get("fields", {}).get("description", {}))
             comments = extract_comments(epic_data.get("fields", {}).get("comment", {}))
             attachments = [
@@ -208,27 +399,20 @@ def fetch_epics(board_id: int):
             comments = f"Error fetching comments: {str(e)}"
             attachments = f"Error fetching attachments: {str(e)}"
 
-        epic_with_metadata = epic.copy()
-        epic_with_metadata.update({
-            "description": description,
-            "comments": comments,
-            "attachments": attachments
-        })
-        epics_with_metadata.append(epic_with_metadata)
+        # epics is our own freshly parsed response, so enrich it in place rather than copying
+        epic["description"] = description
+        epic["comments"] = comments
+        epic["attachments"] = attachments
 
-    return epics_with_metadata
+    return epics
 
 @app.get("/epics/{epic_key}/stories", summary="Fetch stories and metadata for an epic")
-def fetch_epic_details_with_stories(epic_key: str):
-    auth, headers = get_jira_session()
-    jqls = [f'parent = "{epic_key}"']
-    epic_link_field = get_epic_link_field_id()
-    if epic_link_field:
-        jqls.append(f'"{epic_link_field}" = "{epic_key}"')
+async def fetch_epic_details_with_stories(epic_key: str):
+    jqls = await get_epic_child_jqls(epic_key)
 
     stories = []
     for jql in jqls:
-        issues = search_issues(jql)
+        issues = await collect_issues(jql)
         if issues:
             stories = issues
             break
@@ -240,8 +424,7 @@ def fetch_epic_details_with_stories(epic_key: str):
         )
 
     try:
-        epic_url = f"{JIRA_BASE_URL}/rest/api/3/issue/{epic_key}?fields=summary,description,comment,attachment"
-        epic_data = safe_request("GET", epic_url, headers, auth)
+        epic_data = await fetch_issue(epic_key)
         description = extract_description(epic_data.get("fields", {}).get("description", {}))
         comments = extract_comments(epic_data.get("fields", {}).get("comment", {}))
         attachments = [
@@ -261,16 +444,8 @@ def fetch_epic_details_with_stories(epic_key: str):
         "attachments": attachments
     }
 
-@app.get("/stories/{story_key}/tasks", summary="Fetch tasks and subtasks linked to a story")
-def fetch_tasks_and_subtasks(story_key: str):
-    auth, headers = get_jira_session()
-    issue_url = f"{JIRA_BASE_URL}/rest/api/3/issue/{story_key}?fields=summary,description,comment,attachment,issuelinks,subtasks"
-    issue_data = safe_request("GET", issue_url, headers, auth)
-
-    issue_links = issue_data.get("fields", {}).get("issuelinks", [])
-    print(f"[DEBUG] Issue links for {story_key}: {issue_links}")
-
-    tasks = []
+def _linked_tasks(issue_links):
+    linked_issues = []
     for link in issue_links:
         link_type = link.get("type", {}).get("name", "").lower()
         inward = link.get("inwardIssue")
@@ -280,20 +455,47 @@ def fetch_tasks_and_subtasks(story_key: str):
                        outward if outward and outward.get("fields", {}).get("issuetype", {}).get("name") == "Task" else None
 
         if linked_issue:
+            linked_issues.append(linked_issue)
+    return linked_issues
+
+async def fetch_tasks_for_stories(issue_links_by_story: dict) -> dict:
+    # Resolves the linked tasks of many stories at once: one task search and one subtask search
+    # for the whole batch instead of per story. Returns {story_key: [task, ...]}.
+    linked_by_story = {story_key: _linked_tasks(issue_links) for story_key, issue_links in issue_links_by_story.items()}
+    task_keys = list(dict.fromkeys(
+        linked_issue["key"] for linked_issues in linked_by_story.values() for linked_issue in linked_issues
+    ))
+
+    # Tasks and their subtasks are independent searches, so run them side by side
+    task_issues, sub_issues = await gather_or_cancel(
+        bulk_get_issues(task_keys, "summary,description,comment,attachment,subtasks"),
+        bulk_get_issues(task_keys, "summary,description,comment,attachment", match="parent")
+    )
+    missing_sub_keys = [
+        sub["key"]
+        for task_data in task_issues.values()
+        for sub in task_data.get("fields", {}).get("subtasks", [])
+        if sub["key"] not in sub_issues
+    ]
+    if missing_sub_keys:
+        sub_issues.update(await bulk_get_issues(missing_sub_keys, "summary,description,comment,attachment"))
+
+    tasks_by_story = {}
+    for story_key, linked_issues in linked_by_story.items():
+        tasks = []
+        for linked_issue in linked_issues:
             issue_key = linked_issue["key"]
             issue_summary = linked_issue["fields"]["summary"]
 
-            task_url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}?fields=summary,description,comment,attachment,subtasks"
-            task_data = safe_request("GET", task_url, headers, auth)
+            task_data = task_issues.get(issue_key)
+            if task_data is None:
+                logger.warning("Task %s linked to %s was not returned by search", issue_key, story_key)
+                continue
             fields = task_data.get("fields", {})
 
-            subtasks_raw = fields.get("subtasks", [])
             subtasks = []
-            for sub in subtasks_raw:
-                sub_key = sub["key"]
-                sub_url = f"{JIRA_BASE_URL}/rest/api/3/issue/{sub_key}?fields=summary,description,comment,attachment"
-                sub_data = safe_request("GET", sub_url, headers, auth)
-                sub_fields = sub_data.get("fields", {})
+            for sub in fields.get("subtasks", []):
+                sub_fields = sub_issues.get(sub["key"], {}).get("fields", {})
 
                 sub_description = extract_description(sub_fields.get("description", {}))
                 sub_comments = extract_comments(sub_fields.get("comment", {}))
@@ -329,19 +531,30 @@ def fetch_tasks_and_subtasks(story_key: str):
             }
             tasks.append(task_info)
 
-    print(f"[DEBUG] Final tasks list for {story_key}: {tasks}")
-    return tasks
+        logger.debug("Final tasks list for %s: %s", story_key, tasks)
+        tasks_by_story[story_key] = tasks
+    return tasks_by_story
+
+@app.get("/stories/{story_key}/tasks", summary="Fetch tasks and subtasks linked to a story")
+async def fetch_tasks_and_subtasks(story_key: str):
+    # Only the links are needed to discover tasks; skip the heavy ADF and comment fields
+    issue_data = await fetch_issue(story_key, "issuelinks")
+
+    issue_links = issue_data.get("fields", {}).get("issuelinks", [])
+    logger.debug("Issue links for %s: %s", story_key, issue_links)
+
+    tasks_by_story = await fetch_tasks_for_stories({story_key: issue_links})
+    return tasks_by_story[story_key]
 
 @app.get("/teams/project", summary="Get users in a project")
-def get_users_in_project(project_key: str = Query(..., description="Project key to fetch users for")):
-    auth, headers = get_jira_session()
+async def get_users_in_project(project_key: str = Query(..., description="Project key to fetch users for")):
     base_url = f"{JIRA_BASE_URL}/rest/api/3/project/{project_key}/role"
 
     try:
-        roles = safe_request("GET", base_url, headers, auth)
+        roles = await safe_request("GET", base_url)
+        role_datas = await gather_or_cancel(*(safe_request("GET", role_url) for role_url in roles.values()))
         all_users = []
-        for role_name, role_url in roles.items():
-            role_data = safe_request("GET", role_url, headers, auth)
+        for role_name, role_data in zip(roles, role_datas):
             actors = role_data.get("actors", [])
 
             for actor in actors:
@@ -362,138 +575,169 @@ def get_users_in_project(project_key: str = Query(..., description="Project key
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users for project: {str(e)}")
 
-@app.get("/hierarchy", response_model=List[BoardModel], summary="Fetch full board-epic-story-task hierarchy")
-def build_hierarchical_structure():
-    auth, headers = get_jira_session()
-    boards_data = []
+def process_story(story, tasks):
+    story_key = story["key"]
+    # fetch_stories' search already returns the description, comment and attachment fields
+    story_fields = story.get("fields", {})
 
-    boards = fetch_boards()
-    print(f"[INFO] Found {len(boards)} boards")
+    story_description = extract_description(story_fields.get("description", {}))
+    story_comments = extract_comments(story_fields.get("comment", {}))
+    story_attachments = [
+        {"filename": a["filename"], "content": a["content"], "created": a["created"]}
+        for a in story_fields.get("attachment", [])
+    ]
 
-    for board in boards:
-        print(f"[INFO] Processing board: {board['name']} (ID: {board['id']})")
-        epics_data = []
+    # fetch_tasks_for_stories already returns dicts shaped like TaskModel/SubtaskModel
+    return {
+        "id": story["id"],
+        "key": story_key,
+        "summary": story["fields"].get("summary", "No summary"),
+        "description": story_description,
+        "comments": story_comments,
+        "attachments": story_attachments,
+        "tasks": tasks
+    }
 
-        try:
-            epics = fetch_epics(board["id"])
-            print(f"[INFO]  -> Found {len(epics)} epics on board {board['id']}")
-        except Exception as e:
-            print(f"[WARN] Failed to fetch epics for board {board['id']}: {e}")
-            continue
+async def process_epic(epic):
+    epic_key = epic.get("key")
+    logger.info("  -> Processing epic: %s", epic_key)
 
-        for epic in epics:
-            epic_key = epic.get("key")
-            print(f"[INFO]   -> Processing epic: {epic_key}")
+    # Served from the issue cache when fetch_epics already bulk-fetched this epic
+    epic_data = await fetch_issue(epic_key)
 
-            epic_url = f"{JIRA_BASE_URL}/rest/api/3/issue/{epic_key}?fields=summary,description,comment,attachment"
-            epic_data = safe_request("GET", epic_url, headers, auth)
+    epic_description = extract_description(epic_data.get("fields", {}).get("description", {}))
+    epic_comments = extract_comments(epic_data.get("fields", {}).get("comment", {}))
+    epic_attachments = [
+        {"filename": a["filename"], "content": a["content"], "created": a["created"]}
+        for a in epic_data.get("fields", {}).get("attachment", [])
+    ]
 
-            epic_description = extract_description(epic_data.get("fields", {}).get("description", {}))
-            epic_comments = extract_comments(epic_data.get("fields", {}).get("comment", {}))
-            epic_attachments = [
-                {"filename": a["filename"], "content": a["content"], "created": a["created"]}
-                for a in epic_data.get("fields", {}).get("attachment", [])
-            ]
+    try:
+        stories_response = await fetch_stories(epic_key)
+        stories = stories_response.get("stories", [])
+        logger.info("    -> Found %d stories for epic %s", len(stories), epic_key)
+    except Exception as story_err:
+        logger.warning("    -> Failed to fetch stories for epic %s: %s", epic_key, story_err)
+        stories = []
+
+    # Linked tasks of all the epic's stories are resolved in one batch. If that fails the
+    # stories are still returned, just without their tasks.
+    try:
+        tasks_by_story = await fetch_tasks_for_stories({
+            story["key"]: story.get("fields", {}).get("issuelinks", []) for story in stories
+        })
+    except Exception as task_err:
+        logger.warning("    -> Failed to fetch tasks for the stories of epic %s, returning them without tasks: %s", epic_key, task_err)
+        tasks_by_story = {}
 
-            stories_data = []
-            try:
-                stories_response = fetch_stories(epic_key)
-                stories = stories_response.get("stories", [])
-                print(f"[INFO]     -> Found {len(stories)} stories for epic {epic_key}")
-
-                for story in stories:
-                    story_key = story["key"]
-                    try:
-                        story_url = f"{JIRA_BASE_URL}/rest/api/3/issue/{story_key}?fields=summary,description,comment,attachment"
-                        story_data = safe_request("GET", story_url, headers, auth)
-
-                        story_description = extract_description(story_data.get("fields", {}).get("description", {}))
-                        story_comments = extract_comments(story_data.get("fields", {}).get("comment", {}))
-                        story_attachments = [
-                            {"filename": a["filename"], "content": a["content"], "created": a["created"]}
-                            for a in story_data.get("fields", {}).get("attachment", [])
-                        ]
-
-                        tasks = fetch_tasks_and_subtasks(story_key)
-                        task_models = [
-                            TaskModel(
-                                id=task["id"],
-                                key=task["key"],
-                                summary=task["summary"],
-                                description=task.get("description", "No description"),
-                                comments=task.get("comments", []),
-                                attachments=task.get("attachments", []),
-                                subtasks=[
-                                    SubtaskModel(
-                                        id=sub["id"],
-                                        key=sub["key"],
-                                        summary=sub["summary"],
-                                        description=sub.get("description", "No description"),
-                                        comments=sub.get("comments", []),
-                                        attachments=sub.get("attachments", [])
-                                    ) for sub in task.get("subtasks", [])
-                                ]
-                            )
-                            for task in tasks
-                        ]
-
-                        stories_data.append(
-                            StoryModel(
-                                id=story["id"],
-                                key=story_key,
-                                summary=story["fields"].get("summary", "No summary"),
-                                description=story_description,
-                                comments=story_comments,
-                                attachments=story_attachments,
-                                tasks=task_models
-                            )
-                        )
-                    except Exception as task_err:
-                        print(f"[WARN]       -> Failed to fetch tasks for story {story_key}: {task_err}")
-
-            except Exception as story_err:
-                print(f"[WARN]     -> Failed to fetch stories for epic {epic_key}: {story_err}")
-
-            epics_data.append(
-                EpicModel(
-                    id=str(epic.get("id", "unknown")),
-                    name=epic.get("name") or epic.get("summary", "Unnamed Epic"),
-                    description=epic_description,
-                    comments=epic_comments,
-                    attachments=epic_attachments,
-                    stories=stories_data
-                )
-            )
-
-        boards_data.append(
-            BoardModel(
-                id=board["id"],
-                name=board["name"],
-                epics=epics_data
-            )
-        )
+    stories_data = [process_story(story, tasks_by_story.get(story["key"], [])) for story in stories]
+
+    return {
+        "id": str(epic.get("id", "unknown")),
+        "name": epic.get("name") or epic.get("summary", "Unnamed Epic"),
+        "description": epic_description,
+        "comments": epic_comments,
+        "attachments": epic_attachments,
+        "stories": stories_data
+    }
 
-    return boards_data
+async def process_board(board):
+    logger.info("Processing board: %s (ID: %s)", board["name"], board["id"])
+
+    try:
+        epics = await fetch_epics(board["id"])
+        logger.info(" -> Found %d epics on board %s", len(epics), board["id"])
+    except Exception as e:
+        logger.warning("Failed to fetch epics for board %s: %s", board["id"], e)
+        return None
+
+    epics_data = await gather_or_cancel(*(process_epic(epic) for epic in epics))
+
+    return {
+        "id": board["id"],
+        "name": board["name"],
+        "epics": list(epics_data)
+    }
+
+# The process_* helpers build plain dicts shaped like the models above;
+# response_model validates the finished tree once instead of once per node.
+@app.get("/hierarchy", response_model=List[BoardModel], summary="Fetch full board-epic-story-task hierarchy")
+async def build_hierarchical_structure():
+    token = _issue_cache.set({})
+    try:
+        boards = await fetch_boards()
+        logger.info("Found %d boards", len(boards))
+
+        boards_data = await gather_or_cancel(*(process_board(board) for board in boards))
+        return [board_data for board_data in boards_data if board_data is not None]
+    finally:
+        _issue_cache.reset(token)
+
+# Permissions a plain open() would give a new file under the current umask
+_umask = os.umask(0)
+os.umask(_umask)
+_EXPORT_FILE_MODE = 0o666 & ~_umask
+
+def _write_board(f, board_data, first):
+    if not first:
+        f.write(b",")
+    f.write(orjson.dumps(board_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
 @app.get("/hierarchy/save", summary="Save hierarchy to a file")
-def save_hierarchy_to_file():
-    data = build_hierarchical_structure()
+async def save_hierarchy_to_file():
     file_path = "jira_hierarchy.json"
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump([d.dict() for d in data], f, indent=2, ensure_ascii=False)
+    token = _issue_cache.set({})
+    board_tasks = []
+    tmp_path = None
+    try:
+        boards = await fetch_boards()
+        logger.info("Found %d boards", len(boards))
+
+        board_tasks = [asyncio.create_task(process_board(board)) for board in boards]
+        loop = asyncio.get_running_loop()
+
+        # Write each board as soon as its subtree is built so only in-flight boards stay in memory.
+        # The boards go to a temp file next to the export, which replaces it only once complete,
+        # so a failed build never leaves a truncated file in place of the last good export.
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(os.path.abspath(file_path)), prefix=".jira_hierarchy.", suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = f.name
+            f.write(b"[")
+            first = True
+            for next_board in asyncio.as_completed(board_tasks):
+                board_data = await next_board
+                if board_data is None:
+                    continue
+                # Encoding and writing a large board is blocking work; keep it off the event loop
+                # (run_in_executor rather than asyncio.to_thread, which needs Python 3.9)
+                await loop.run_in_executor(None, _write_board, f, board_data, first)
+                first = False
+            f.write(b"]")
+        # NamedTemporaryFile creates the file owner-only; give the export the mode open() would
+        os.chmod(tmp_path, _EXPORT_FILE_MODE)
+        os.replace(tmp_path, file_path)
+        tmp_path = None
+    finally:
+        # Stop boards still calling Jira after a failure, and drop the partial temp file
+        for task in board_tasks:
+            task.cancel()
+        await asyncio.gather(*board_tasks, return_exceptions=True)
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        _issue_cache.reset(token)
     return {"status": "success", "message": f"Data saved to {file_path}"}
 
 # ---------------------- ISSUE ENDPOINTS ----------------------
 
 @app.get("/issues/{issue_key}/description", summary="Get issue description")
-def get_issue_description(issue_key: str):
-    issue_data = get_issue(issue_key)
+async def get_issue_description(issue_key: str):
+    issue_data = await get_issue(issue_key, fields="description")
     description = extract_description(issue_data.get("fields", {}).get("description", {}))
     return {"description": description}
 
 @app.put("/issues/{issue_key}/description", summary="Update issue description")
-def update_issue_description(issue_key: str, description: str):
-    auth, headers = get_jira_session()
+async def update_issue_description(issue_key: str, description: str):
     url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}"
     payload = {
         "fields": {
@@ -509,18 +753,16 @@ def update_issue_description(issue_key: str, description: str):
             }
         }
     }
-    return safe_request("PUT", url, headers, auth, json=payload)
+    return await safe_request("PUT", url, json=payload)
 
 @app.get("/issues/{issue_key}/comments", summary="List comments on an issue")
-def list_issue_comments(issue_key: str):
-    auth, headers = get_jira_session()
+async def list_issue_comments(issue_key: str):
     url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}/comment?fields=comments"
-    comments_data = safe_request("GET", url, headers, auth)
+    comments_data = await safe_request("GET", url)
     return extract_comments(comments_data)
 
 @app.post("/issues/{issue_key}/comments", summary="Add comment to an issue")
-def add_comment(issue_key: str, comment: str):
-    auth, headers = get_jira_session()
+async def add_comment(issue_key: str, comment: str):
     url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}/comment"
     payload = {
         "body": {
@@ -534,11 +776,11 @@ def add_comment(issue_key: str, comment: str):
             ]
         }
     }
-    return safe_request("POST", url, headers, auth, json=payload)
+    return await safe_request("POST", url, json=payload)
 
 @app.get("/issues/{issue_key}/attachments", summary="List attachments of an issue")
-def list_attachments(issue_key: str):
-    issue_data = get_issue(issue_key)
+async def list_attachments(issue_key: str):
+    issue_data = await get_issue(issue_key, fields="attachment")
     attachments = [
         {"filename": a["filename"], "content": a["content"], "created": a["created"]}
         for a in issue_data.get("fields", {}).get("attachment", [])
@@ -547,23 +789,22 @@ def list_attachments(issue_key: str):
 
 @app.post("/issues/{issue_key}/attachments", summary="Add attachment to an issue")
 async def add_attachment(issue_key: str, file: UploadFile = File(...)):
-    auth, headers = get_jira_session()
-    headers["X-Atlassian-Token"] = "no-check"
+    headers = {"X-Atlassian-Token": "no-check"}
     url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}/attachments"
 
     try:
-        file_content = await file.read()
-        files = {'file': (file.filename, file_content, file.content_type)}
-        response = requests.post(url, headers=headers, auth=auth, files=files)
+        # Hand httpx the spooled file itself so it is streamed in chunks rather than read into memory;
+        # httpx derives the multipart Content-Length from the file size on its own
+        files = {'file': (file.filename, file.file, file.content_type)}
+        response = await client.post(url, headers=headers, files=files)
         response.raise_for_status()
         return response.json()
     except Exception as e:
-        print(f"[ERROR] Failed to upload attachment to {issue_key}: {str(e)}")
+        logger.error("Failed to upload attachment to %s: %s", issue_key, e)
         raise HTTPException(status_code=500, detail=f"Error uploading attachment: {str(e)}")
 
 @app.post("/issues", summary="Create an issue")
-def create_issue(project_key: str, summary: str, issue_type: str = "Task"):
-    auth, headers = get_jira_session()
+async def create_issue(project_key: str, summary: str, issue_type: str = "Task"):
     url = f"{JIRA_BASE_URL}/rest/api/3/issue"
     payload = {
         "fields": {
@@ -572,33 +813,29 @@ def create_issue(project_key: str, summary: str, issue_type: str = "Task"):
             "issuetype": {"name": issue_type}
         }
     }
-    return safe_request("POST", url, headers, auth, json=payload)
+    return await safe_request("POST", url, json=payload)
 
 @app.get("/issues", summary="Get all issues in a project")
-def list_issues(project_key: str = Query(..., description="Project key like 'KAN'")):
+async def list_issues(project_key: str = Query(..., description="Project key like 'KAN'")):
     jql = f"project = {project_key} ORDER BY created DESC"
-    return search_issues(jql)
+    return await collect_issues(jql)
 
 @app.put("/issues/{issue_id}", summary="Update an issue")
-def update_issue(issue_id: str, summary: str):
-    auth, headers = get_jira_session()
+async def update_issue(issue_id: str, summary: str):
     url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_id}"
     payload = {"fields": {"summary": summary}}
-    return safe_request("PUT", url, headers, auth, json=payload)
+    return await safe_request("PUT", url, json=payload)
 
 @app.delete("/issues/{issue_id}", summary="Delete an issue")
-def delete_issue(issue_id: str):
-    auth, headers = get_jira_session()
+async def delete_issue(issue_id: str):
     url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_id}"
     try:
-        response = requests.delete(url, headers=headers, auth=auth)
+        response = await client.delete(url)
         response.raise_for_status()
         return {"detail": "Issue deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting issue: {str(e)}")
 
 @app.get("/issues/{issue_key}", summary="Get issue details")
-def get_issue(issue_key: str):
-    auth, headers = get_jira_session()
-    url = f"{JIRA_BASE_URL}/rest/api/3/issue/{issue_key}?fields=summary,description,comment,attachment"
-    return safe_request("GET", url, headers, auth)
\ No newline at end of file
+async def get_issue(issue_key: str, fields: str = "summary,description,comment,attachment"):
+    return await fetch_issue(issue_key, fields)
\ No newline at end of file